@@ -8,10 +8,261 @@ This module provides a simulation for finding optimal metro routes using:
 Author: Özgün Kasapoglu
 """
 
-from collections import defaultdict, deque
+from array import array
+from collections import OrderedDict, defaultdict, deque
 import heapq
+from itertools import chain
+from math import hypot
+import operator
 from typing import Dict, List, Set, Tuple, Optional
 
+_INF = float('inf')
+# Heap keys pack (time << _ID_BITS) | int_id so one int compare orders entries
+_ID_BITS = 32
+_ID_MASK = (1 << _ID_BITS) - 1
+# Travel times are stored in array('i') columns
+_MAX_TIME = 2 ** 31 - 1
+# Largest edge weight for which Dial's bucket queue replaces the binary heap
+_DIAL_MAX_WEIGHT = 256
+# Queries handled per bit-parallel BFS pass, one bit lane each
+_MSBFS_LANES = 64
+# Per-network memoized (start, target) route queries
+_ROUTE_CACHE_SIZE = 4096
+# Networks up to this many stations keep all-pairs rows for repeated destinations
+_APSP_THRESHOLD = 256
+
+def _bfs_csr(indptr: array, indices: array, src: int, dst: int) -> Optional[List[int]]:
+    """Bidirectional BFS kernel over CSR arrays for the fewest-stops path.
+
+    Grows one frontier from src and one from dst, always expanding the
+    smaller by a full level, and stops as soon as an edge joins the two
+    sides. All state is local, so concurrent calls are safe. Returns the
+    path as int_ids, or None if dst is unreachable.
+    """
+    if src == dst:
+        return [src]
+
+    # Side marks which search reached a station (0 = unseen,
+    # 1 = from start, 2 = from target) and guards parent slots
+    side = bytearray(len(indptr) - 1)
+    parent = [-1] * (len(indptr) - 1)
+    side[src] = 1
+    side[dst] = 2
+    fwd = deque([src])
+    bwd = deque([dst])
+
+    while fwd and bwd:
+        # Expand the smaller frontier by one full level
+        if len(fwd) <= len(bwd):
+            frontier, mark = fwd, 1
+        else:
+            frontier, mark = bwd, 2
+
+        for _ in range(len(frontier)):
+            current_id = frontier.popleft()
+
+            # Explore all neighboring stations
+            for neighbor_id in indices[indptr[current_id]:indptr[current_id + 1]]:
+                seen = side[neighbor_id]
+                if not seen:
+                    side[neighbor_id] = mark
+                    parent[neighbor_id] = current_id
+                    frontier.append(neighbor_id)
+                elif seen != mark:
+                    # Early exit once the two searches meet
+                    if mark == 1:
+                        last_f, meet_id = current_id, neighbor_id
+                    else:
+                        last_f, meet_id = neighbor_id, current_id
+                    path = []
+                    while last_f != -1:
+                        path.append(last_f)
+                        last_f = parent[last_f]
+                    path.reverse()
+                    while meet_id != -1:
+                        path.append(meet_id)
+                        meet_id = parent[meet_id]
+                    return path
+
+    return None
+
+def _dijkstra_csr(indptr: array, indices: array, weights: array, src: int, dst: int,
+                  best_times: List[float], parent: List[int], touched: List[int],
+                  estimates: List[int], xs: array, ys: array, scale: float,
+                  links: Dict[int, List[Tuple[int, int]]]) -> Optional[int]:
+    """A* (Dijkstra guided by a straight-line heuristic) over CSR arrays.
+
+    Touches only ints and flat arrays so the hot loop stays free of Station
+    objects. best_times/parent/estimates are caller-owned scratch lists;
+    best_times must hold _INF everywhere on entry, so a single comparison
+    both detects unseen stations and rejects worse paths. Every station the
+    search reaches is appended to touched, and the caller restores those
+    best_times slots once it has read the route. The heuristic,
+    scale * distance(station, dst) floored to an int, is computed the first
+    time a station is reached and memoized in estimates; scale 0 turns the
+    search into plain Dijkstra. links adds per-query (neighbor, time) edges
+    on top of the CSR rows. Returns the total time to dst, or None if it is
+    unreachable; parent then holds the predecessor chain from dst back to
+    src (-1).
+    """
+    tx, ty = xs[dst], ys[dst]
+    best_times[src] = 0
+    parent[src] = -1
+    touched.append(src)
+    estimates[src] = int(scale * hypot(xs[src] - tx, ys[src] - ty)) if scale else 0
+    # Packed (g + h, int_id) keys; a plain list keeps heapq's C sift loops,
+    # which beat a hand-written heap over array('q') despite the boxing
+    heap = [(estimates[src] << _ID_BITS) | src]
+    heappop, heappush = heapq.heappop, heapq.heappush
+
+    while heap:
+        key = heappop(heap)
+        current_id = key & _ID_MASK
+        current_time = (key >> _ID_BITS) - estimates[current_id]
+
+        # Return when target is reached
+        if current_id == dst:
+            return current_time
+
+        # Skip if better path already exists
+        if current_time > best_times[current_id]:
+            continue
+
+        # Explore all neighbors
+        lo, hi = indptr[current_id], indptr[current_id + 1]
+        edges = zip(indices[lo:hi], weights[lo:hi])
+        if current_id in links:
+            edges = chain(edges, links[current_id])
+        for neighbor_id, time in edges:
+            new_time = current_time + time
+            # The _INF sentinel folds the "unseen" test into one comparison
+            if new_time < best_times[neighbor_id]:
+                if best_times[neighbor_id] == _INF:
+                    # First visit this query: memoize the heuristic
+                    touched.append(neighbor_id)
+                    estimates[neighbor_id] = (int(scale * hypot(xs[neighbor_id] - tx, ys[neighbor_id] - ty))
+                                              if scale else 0)
+                best_times[neighbor_id] = new_time
+                parent[neighbor_id] = current_id
+                heappush(heap, ((new_time + estimates[neighbor_id]) << _ID_BITS) | neighbor_id)
+
+    return None
+
+def _dial_csr(indptr: array, indices: array, weights: array, src: int, dst: int,
+              best_times: List[float], parent: List[int], touched: List[int],
+              estimates: List[int], xs: array, ys: array, scale: float,
+              links: Dict[int, List[Tuple[int, int]]], max_weight: int) -> Optional[int]:
+    """A* with Dial's bucket queue for small integer weights.
+
+    Same contract as _dijkstra_csr, with buckets indexed by g + h. The
+    heuristic is consistent, so an edge raises g + h by at most twice its
+    weight; 2 * max_weight + 1 cyclic buckets therefore hold every pending
+    entry and each insert/extract is O(1).
+    """
+    tx, ty = xs[dst], ys[dst]
+    best_times[src] = 0
+    parent[src] = -1
+    touched.append(src)
+    estimates[src] = int(scale * hypot(xs[src] - tx, ys[src] - ty)) if scale else 0
+    size = 2 * max_weight + 1
+    buckets: List[List[int]] = [[] for _ in range(size)]
+    current_key = estimates[src]
+    buckets[current_key % size].append(src)
+    pending = 1
+
+    while pending:
+        # Advance to the next non-empty bucket
+        bucket = buckets[current_key % size]
+        while not bucket:
+            current_key += 1
+            bucket = buckets[current_key % size]
+        current_id = bucket.pop()
+        pending -= 1
+        current_time = current_key - estimates[current_id]
+
+        # Skip if better path already exists
+        if current_time > best_times[current_id]:
+            continue
+
+        # Return when target is reached
+        if current_id == dst:
+            return current_time
+
+        # Explore all neighbors
+        lo, hi = indptr[current_id], indptr[current_id + 1]
+        edges = zip(indices[lo:hi], weights[lo:hi])
+        if current_id in links:
+            edges = chain(edges, links[current_id])
+        for neighbor_id, time in edges:
+            new_time = current_time + time
+            # The _INF sentinel folds the "unseen" test into one comparison
+            if new_time < best_times[neighbor_id]:
+                if best_times[neighbor_id] == _INF:
+                    # First visit this query: memoize the heuristic
+                    touched.append(neighbor_id)
+                    estimates[neighbor_id] = (int(scale * hypot(xs[neighbor_id] - tx, ys[neighbor_id] - ty))
+                                              if scale else 0)
+                best_times[neighbor_id] = new_time
+                parent[neighbor_id] = current_id
+                buckets[(new_time + estimates[neighbor_id]) % size].append(neighbor_id)
+                pending += 1
+
+    return None
+
+def _delta_stepping_csr(indptr: array, indices: array, weights: array,
+                        src: int, delta: int) -> Tuple[List[float], List[int]]:
+    """Single-source shortest times to every station using delta-stepping.
+
+    Stations are bucketed by best_times // delta. Each phase gathers the
+    light-edge (weight <= delta) relaxation requests of a whole bucket before
+    applying them, the step that parallel implementations spread across
+    cores; heavy edges are relaxed once per settled bucket. Returns
+    (best_times, parent) indexed by int_id; unreachable entries keep _INF
+    and -1.
+    """
+    n = len(indptr) - 1
+    best_times = [_INF] * n
+    parent = [-1] * n
+    buckets: Dict[int, Set[int]] = {}
+
+    def relax(node_id: int, new_time: int, from_id: int) -> None:
+        old_time = best_times[node_id]
+        if new_time < old_time:
+            if old_time != _INF and old_time // delta in buckets:
+                buckets[old_time // delta].discard(node_id)
+            best_times[node_id] = new_time
+            parent[node_id] = from_id
+            buckets.setdefault(new_time // delta, set()).add(node_id)
+
+    relax(src, 0, -1)
+    while buckets:
+        index = min(buckets)
+        settled: List[int] = []
+        # Light edges may refill the current bucket, so repeat until it drains
+        while buckets.get(index):
+            frontier = buckets.pop(index)
+            settled.extend(frontier)
+            requests = []
+            for current_id in frontier:
+                current_time = best_times[current_id]
+                for k in range(indptr[current_id], indptr[current_id + 1]):
+                    if weights[k] <= delta:
+                        requests.append((indices[k], current_time + weights[k], current_id))
+            for neighbor_id, new_time, from_id in requests:
+                relax(neighbor_id, new_time, from_id)
+        buckets.pop(index, None)
+
+        requests = []
+        for current_id in settled:
+            current_time = best_times[current_id]
+            for k in range(indptr[current_id], indptr[current_id + 1]):
+                if weights[k] > delta:
+                    requests.append((indices[k], current_time + weights[k], current_id))
+        for neighbor_id, new_time, from_id in requests:
+            relax(neighbor_id, new_time, from_id)
+
+    return best_times, parent
+
 class Station:
     """Represents a metro station with connections to other stations.
     
@@ -19,38 +270,112 @@ class Station:
         idx (str): Unique identifier for the station
         name (str): Human-readable station name
         line (str): Metro line name
-        neighbors (List[Tuple[Station, int]]): Connected stations with travel times
+        int_id (int): Dense integer ID assigned by the owning network (-1 if unassigned)
+        neighbor_ids (array): int_ids of connected stations
+        neighbor_times (array): Travel times, parallel to neighbor_ids
+        x, y (Optional[float]): Map coordinates, used to guide A* when every station has them
     """
-    def __init__(self, idx: str, name: str, line: str):
+    __slots__ = ('idx', 'name', 'line', 'int_id', 'neighbor_ids', 'neighbor_times', 'x', 'y')
+
+    def __init__(self, idx: str, name: str, line: str, int_id: int = -1,
+                 x: Optional[float] = None, y: Optional[float] = None):
         """Initialize a metro station."""
         self.idx = idx
         self.name = name
         self.line = line
-        self.neighbors: List[Tuple['Station', int]] = []
+        self.int_id = int_id
+        self.x = x
+        self.y = y
+        # Adjacency kept as parallel typed arrays rather than (Station, time) tuples
+        self.neighbor_ids = array('i')
+        self.neighbor_times = array('i')
 
     def add_neighbors(self, station: 'Station', time: int):
         """Add a bidirectional connection to another station with travel time."""
-        self.neighbors.append((station, time))
+        self.neighbor_ids.append(station.int_id)
+        self.neighbor_times.append(time)
 
 class MetroNetwork:
     """Represents the complete metro network with route finding capabilities."""
     def __init__(self):
         """Initialize an empty metro network."""
         self.stations: Dict[str, Station] = {}
-        self.lines: Dict[str, List[Station]] = defaultdict(list)
+        self._by_id: List[Station] = []  # Stations indexed by their int_id
+        # CSR adjacency, rebuilt by finalize() whenever the network changes
+        self._indptr = array('i', [0])
+        self._indices = array('i')
+        self._weights = array('i')
+        self._max_weight = 0
+        # A* heuristic: coordinates plus a minutes-per-distance lower bound (0 = off)
+        self._xs = array('d')
+        self._ys = array('d')
+        self._time_per_unit = 0.0
+        # Per-query scratch for route kernels; _dist is all _INF between queries
+        # and _touched lists the slots a query must restore
+        self._dist: List[float] = []
+        self._parent: List[int] = []
+        self._touched: List[int] = []
+        self._estimates: List[int] = []
+        # Contracted graph over core stations; each CSR entry is a whole chain
+        # of degree-2 stations (interior int_ids kept in _c_chains)
+        self._c_indptr = array('i', [0])
+        self._c_indices = array('i')
+        self._c_weights = array('i')
+        self._c_from = array('i')
+        self._c_chains: List[Tuple[int, ...]] = []
+        self._c_max_weight = 0
+        # Per non-core station: contracted entry of its chain, position, time from chain start
+        self._chain_edge = array('i')
+        self._chain_pos = array('i')
+        self._chain_offset = array('i')
+        # All-pairs tables for small networks, row per target (None until a
+        # target repeats): times and next hops; _apsp_seen flags queried targets
+        self._apsp_dist: Optional[List[Optional[List[float]]]] = None
+        self._apsp_next: Optional[List[Optional[List[int]]]] = None
+        self._apsp_seen = bytearray()
+        # Fastest-route structures (tables or contracted graph), built lazily
+        self._routes_ready = False
+        self._finalized = True
+        # LRU route caches keyed by (start int_id, target int_id), cleared on any
+        # change; plain instance state, so copies and pickles stay independent
+        self._bfs_cache: OrderedDict = OrderedDict()
+        self._route_cache: OrderedDict = OrderedDict()
+
+    @property
+    def lines(self) -> Dict[str, List[Station]]:
+        """Stations grouped by line name, built on demand in insertion order."""
+        lines: Dict[str, List[Station]] = defaultdict(list)
+        for station in self.stations.values():
+            lines[station.line].append(station)
+        return lines
 
-    def add_station(self, idx: str, name: str, line: str) -> None:
+    def add_station(self, idx: str, name: str, line: str,
+                    x: Optional[float] = None, y: Optional[float] = None) -> None:
         """Add a new station to the network.
         
         Args:
             idx: Unique station identifier
             name: Display name of the station
             line: Metro line name
+            x: Optional map x coordinate
+            y: Optional map y coordinate
+
+        A repeated idx is ignored, so int_ids stay dense:
+
+        >>> metro = MetroNetwork()
+        >>> metro.add_station("A1", "Alpha", "Line Red")
+        >>> metro.add_station("A2", "Beta", "Line Red")
+        >>> metro.add_station("A1", "Alpha again", "Line Blue")
+        >>> len(metro.stations)
+        2
+        >>> [(s.idx, s.name, s.int_id) for s in metro.stations.values()]
+        [('A1', 'Alpha', 0), ('A2', 'Beta', 1)]
         """
         if idx not in self.stations:  # Prevent duplicate stations
-            station = Station(idx, name, line)
+            station = Station(idx, name, line, len(self._by_id), x, y)
             self.stations[idx] = station
-            self.lines[line].append(station)
+            self._by_id.append(station)
+            self._invalidate()
 
     def add_connection(self, station1_id: str, station2_id: str, time: int) -> None:
         """Create a bidirectional connection between two stations.
@@ -58,15 +383,213 @@ class MetroNetwork:
         Args:
             station1_id: ID of first station
             station2_id: ID of second station
-            time: Travel time in minutes
+            time: Travel time in whole minutes (an int from 0 to 2**31 - 1)
+
+        Any integer type is accepted (e.g. numpy.int64); bool is not:
+
+        >>> metro = MetroNetwork()
+        >>> metro.add_station("A1", "Alpha", "Line Red")
+        >>> metro.add_station("A2", "Beta", "Line Red")
+        >>> metro.add_connection("A1", "A2", True)
+        Traceback (most recent call last):
+            ...
+        ValueError: travel time must be an integer from 0 to 2147483647, got True
+
+        Raises:
+            ValueError: If time is not a non-negative integer in range
         """
+        message = f"travel time must be an integer from 0 to {_MAX_TIME}, got {time!r}"
+        if isinstance(time, bool):
+            raise ValueError(message)
+        try:
+            time = operator.index(time)
+        except TypeError:
+            raise ValueError(message) from None
+        if not 0 <= time <= _MAX_TIME:
+            raise ValueError(message)
         station1 = self.stations[station1_id]
         station2 = self.stations[station2_id]
         station1.add_neighbors(station2, time)
         station2.add_neighbors(station1, time)
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        """Mark derived arrays stale and drop cached routes after a change."""
+        self._finalized = False
+        self._routes_ready = False
+        self._bfs_cache.clear()
+        self._route_cache.clear()
+
+    @staticmethod
+    def _cached(cache: OrderedDict, key: Tuple[int, int], compute):
+        """Return cache[key], computing and storing it on a miss (LRU eviction)."""
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        value = cache[key] = compute(*key)
+        if len(cache) > _ROUTE_CACHE_SIZE:
+            cache.popitem(last=False)
+        return value
+
+    def finalize(self) -> None:
+        """Flatten all station adjacencies into CSR arrays used by route queries.
+
+        Called automatically by the query methods after the network changes;
+        call it explicitly to pay the build cost up front.
+        """
+        indptr = array('i', [0])
+        indices = array('i')
+        weights = array('i')
+        for station in self._by_id:
+            indices.extend(station.neighbor_ids)
+            weights.extend(station.neighbor_times)
+            indptr.append(len(indices))
+        self._indptr, self._indices, self._weights = indptr, indices, weights
+        self._max_weight = max(weights, default=0)
+        self._finalized = True
+
+    def _prepare_routes(self) -> None:
+        """Set up fastest-route structures; only fastest-route queries pay for this.
+
+        Every network gets the contracted graph, the A* heuristic and the
+        per-query scratch lists; small ones also get empty all-pairs tables
+        whose rows are filled once a target repeats.
+        """
+        n = len(self._by_id)
+        self._dist = [_INF] * n
+        self._parent = [-1] * n
+        self._touched = []
+        self._estimates = [0] * n
+        self._build_heuristic()
+        if n <= _APSP_THRESHOLD:
+            self._apsp_dist = [None] * n
+            self._apsp_next = [None] * n
+            self._apsp_seen = bytearray(n)
+        else:
+            self._apsp_dist = self._apsp_next = None
+        self._contract()
+        self._routes_ready = True
+
+    def _apsp_row(self, target_id: int) -> Tuple[List[float], List[int]]:
+        """Return (times, next hops) of every station towards target_id.
+
+        Connections are bidirectional, so the shortest-path tree rooted at the
+        target gives each station its next hop towards it. Rows are computed
+        the second time a query ends at their target and kept until the
+        network changes.
+        """
+        if self._apsp_dist[target_id] is None:
+            best_times, parent = _delta_stepping_csr(self._indptr, self._indices, self._weights,
+                                                     target_id, max(self._max_weight, 1))
+            self._apsp_dist[target_id] = best_times
+            self._apsp_next[target_id] = parent
+        return self._apsp_dist[target_id], self._apsp_next[target_id]
+
+    def _build_heuristic(self) -> None:
+        """Derive the A* time-per-distance scale from station coordinates.
+
+        The scale is the smallest time/distance ratio over all connections,
+        so scale * straight-line distance never overestimates the remaining
+        travel time. Left at 0 (plain Dijkstra) unless every station has
+        coordinates.
+        """
+        self._time_per_unit = 0.0
+        coords = [(station.x, station.y) for station in self._by_id]
+        if any(x is None or y is None for x, y in coords):
+            self._xs = array('d', bytes(8 * len(coords)))
+            self._ys = array('d', bytes(8 * len(coords)))
+            return
+        self._xs = array('d', (x for x, _ in coords))
+        self._ys = array('d', (y for _, y in coords))
+
+        scale = _INF
+        indptr, indices, weights = self._indptr, self._indices, self._weights
+        for u in range(len(coords)):
+            for k in range(indptr[u], indptr[u + 1]):
+                distance = hypot(self._xs[u] - self._xs[indices[k]], self._ys[u] - self._ys[indices[k]])
+                if distance > 0:
+                    scale = min(scale, weights[k] / distance)
+        if scale != _INF:
+            # Shave off a little so float rounding cannot make the bound inadmissible
+            self._time_per_unit = scale * (1 - 1e-9)
     
+    def _contract(self) -> None:
+        """Collapse chains of degree-2 stations into single weighted edges.
+
+        Core stations are those with degree other than 2, a transfer to
+        another line, or both connections to the same station; every other
+        station sits inside a chain between two core stations. Chains that
+        close into a cycle with no core station get one promoted to core.
+        """
+        indptr, indices, weights = self._indptr, self._indices, self._weights
+        by_id = self._by_id
+        n = len(by_id)
+        core = bytearray(n)
+        for v in range(n):
+            lo, hi = indptr[v], indptr[v + 1]
+            if (hi - lo != 2 or indices[lo] == indices[lo + 1]
+                    or any(by_id[u].line != by_id[v].line for u in indices[lo:hi])):
+                core[v] = 1
+
+        def walk(u: int, k: int) -> Tuple[int, int, List[int], List[int]]:
+            """Follow CSR entry k of core station u to the next core station."""
+            prev, v, total = u, indices[k], weights[k]
+            interior: List[int] = []
+            offsets: List[int] = []
+            while not core[v]:
+                interior.append(v)
+                offsets.append(total)
+                j = indptr[v]
+                if indices[j] == prev:
+                    j += 1
+                prev, v, total = v, indices[j], total + weights[j]
+            return v, total, interior, offsets
+
+        # Mark chain stations reachable from a core station; leftovers form pure cycles
+        covered = bytearray(core)
+        for u in range(n):
+            if core[u]:
+                for k in range(indptr[u], indptr[u + 1]):
+                    for v in walk(u, k)[2]:
+                        covered[v] = 1
+        for u in range(n):
+            if not covered[u]:
+                core[u] = covered[u] = 1
+                for v in walk(u, indptr[u])[2]:
+                    covered[v] = 1
+
+        c_indptr = array('i', [0])
+        c_indices = array('i')
+        c_weights = array('i')
+        c_from = array('i')
+        c_chains: List[Tuple[int, ...]] = []
+        chain_edge = array('i', [-1]) * n
+        chain_pos = array('i', [0]) * n
+        chain_offset = array('i', [0]) * n
+        for u in range(n):
+            if core[u]:
+                for k in range(indptr[u], indptr[u + 1]):
+                    end, total, interior, offsets = walk(u, k)
+                    edge = len(c_indices)
+                    c_indices.append(end)
+                    c_weights.append(total)
+                    c_from.append(u)
+                    c_chains.append(tuple(interior))
+                    # Each chain is walked from both ends; keep the first orientation
+                    if interior and chain_edge[interior[0]] == -1:
+                        for pos, (v, offset) in enumerate(zip(interior, offsets)):
+                            chain_edge[v] = edge
+                            chain_pos[v] = pos
+                            chain_offset[v] = offset
+            c_indptr.append(len(c_indices))
+
+        self._c_indptr, self._c_indices, self._c_weights = c_indptr, c_indices, c_weights
+        self._c_from, self._c_chains = c_from, c_chains
+        self._c_max_weight = max(c_weights, default=0)
+        self._chain_edge, self._chain_pos, self._chain_offset = chain_edge, chain_pos, chain_offset
+
     def find_the_least_transfer(self, start_id: str, target_id: str) -> Optional[List[Station]]:
-        """Find route with minimum transfers using BFS algorithm.
+        """Find route with minimum transfers using bidirectional BFS.
         
         Args:
             start_id: Starting station ID
@@ -79,33 +602,130 @@ class MetroNetwork:
         if start_id not in self.stations or target_id not in self.stations:
             return None
 
-        start = self.stations[start_id]
-        target = self.stations[target_id]
+        if not self._finalized:
+            self.finalize()
+        path = self._cached(self._bfs_cache,
+                            (self.stations[start_id].int_id, self.stations[target_id].int_id),
+                            self._least_transfer_ids)
+        if path is None:
+            return None
+        return [self._by_id[station_id] for station_id in path]
 
-        # BFS initialization with (current station, path)
-        queue = deque()
-        queue.append((start, [start]))
-        visited = set()
-        visited.add(start.idx)
+    def _least_transfer_ids(self, src: int, dst: int) -> Optional[Tuple[int, ...]]:
+        """Bidirectional BFS between int_ids; returns the path as int_ids."""
+        path = _bfs_csr(self._indptr, self._indices, src, dst)
+        return None if path is None else tuple(path)
 
-        while queue:
-            current_station, path = queue.popleft()
-            
-            # Early exit if target found
-            if current_station.idx == target.idx:
-                return path
+    def multi_source_bfs(self, sources: List[str], targets: List[str]) -> List[Optional[List[Station]]]:
+        """Answer many least-transfer queries with bit-parallel BFS passes.
 
-            # Explore all neighboring stations
-            for neighbor, _ in current_station.neighbors:
-                if neighbor.idx not in visited:
-                    visited.add(neighbor.idx)
-                    new_path = path + [neighbor]
-                    queue.append((neighbor, new_path))
+        Up to _MSBFS_LANES queries share one traversal: every station keeps a
+        bitmask with one lane per query, so each edge scan advances all lanes
+        at once.
+
+        Args:
+            sources: Starting station IDs
+            targets: Destination station IDs, paired with sources by position
+
+        Returns:
+            One entry per query: list of stations in path order, or None if
+            either station is unknown or no path exists
+
+        Raises:
+            ValueError: If sources and targets differ in length
+        """
+        if len(sources) != len(targets):
+            raise ValueError(f"got {len(sources)} sources but {len(targets)} targets")
+        if not self._finalized:
+            self.finalize()
+        routes: List[Optional[List[Station]]] = [None] * len(sources)
+        for offset in range(0, len(sources), _MSBFS_LANES):
+            self._multi_source_bfs_batch(sources[offset:offset + _MSBFS_LANES],
+                                         targets[offset:offset + _MSBFS_LANES],
+                                         routes, offset)
+        return routes
 
-        return None
+    def _multi_source_bfs_batch(self, sources: List[str], targets: List[str],
+                                routes: List[Optional[List[Station]]], offset: int) -> None:
+        """Run one bit-parallel BFS pass and store its paths into routes[offset:]."""
+        indptr, indices = self._indptr, self._indices
+        visited = [0] * len(self._by_id)  # Lanes that have reached each station
+        frontier: Dict[int, int] = {}
+        target_lanes: Dict[int, int] = {}  # Target int_id -> lanes still looking for it
+        parents: List[Dict[int, int]] = []
+        lane_targets: List[int] = []
+
+        for lane, (start_id, target_id) in enumerate(zip(sources, targets)):
+            parents.append({})
+            if start_id not in self.stations or target_id not in self.stations:
+                lane_targets.append(-1)
+                continue
+            src = self.stations[start_id].int_id
+            dst = self.stations[target_id].int_id
+            bit = 1 << lane
+            parents[lane][src] = -1
+            lane_targets.append(dst)
+            visited[src] |= bit
+            frontier[src] = frontier.get(src, 0) | bit
+            target_lanes[dst] = target_lanes.get(dst, 0) | bit
+
+        def drop_finished_lanes() -> None:
+            for dst in list(target_lanes):
+                target_lanes[dst] &= ~visited[dst]
+                if not target_lanes[dst]:
+                    del target_lanes[dst]
+
+        drop_finished_lanes()
+        while frontier and target_lanes:
+            next_frontier: Dict[int, int] = {}
+            for current_id, mask in frontier.items():
+                for neighbor_id in indices[indptr[current_id]:indptr[current_id + 1]]:
+                    new = mask & ~visited[neighbor_id]
+                    if new:
+                        visited[neighbor_id] |= new
+                        next_frontier[neighbor_id] = next_frontier.get(neighbor_id, 0) | new
+                        # Record the predecessor for every newly arrived lane
+                        while new:
+                            low = new & -new
+                            parents[low.bit_length() - 1][neighbor_id] = current_id
+                            new ^= low
+            frontier = next_frontier
+            drop_finished_lanes()
+
+        for lane, dst in enumerate(lane_targets):
+            if dst != -1 and visited[dst] >> lane & 1:
+                routes[offset + lane] = self._build_path_ids(parents[lane], dst)
 
     def find_fastest_route(self, start_id: str, target_id: str) -> Optional[Tuple[List[Station], int]]:
-        """Find fastest route using Dijkstra's algorithm variation.
+        """Find fastest route using A* (Dijkstra's algorithm when coordinates are missing).
+
+        Each destination's first query searches the contracted graph of
+        core stations, crossing chains of ordinary stops in a single step
+        and stopping once the destination is reached. On networks of up to
+        _APSP_THRESHOLD stations a destination queried again gets an
+        all-pairs row, so later queries to it are table lookups that no
+        longer need the heuristic.
+
+        Queries share per-network scratch lists (_dist, _parent), so one
+        network must not be queried from several threads at once.
+
+        Cached routes belong to the network they were found on, so a copy
+        answers from its own stations:
+
+        >>> import copy, pickle
+        >>> metro = MetroNetwork()
+        >>> for idx in "ABC":
+        ...     metro.add_station(idx, idx, "Line Red")
+        >>> metro.add_connection("A", "B", 5)
+        >>> metro.add_connection("B", "C", 5)
+        >>> metro.find_fastest_route("A", "C")[1]
+        10
+        >>> shortcut = copy.deepcopy(metro)
+        >>> shortcut.add_connection("A", "C", 1)
+        >>> shortcut.find_fastest_route("A", "C")[1], metro.find_fastest_route("A", "C")[1]
+        (1, 10)
+        >>> pickle.loads(pickle.dumps(metro)).find_fastest_route("A", "C")[1]
+        10
         
         Args:
             start_id: Starting station ID
@@ -118,35 +738,144 @@ class MetroNetwork:
         if start_id not in self.stations or target_id not in self.stations:
             return None
 
-        start = self.stations[start_id]
-        target = self.stations[target_id]
+        if not self._finalized:
+            self.finalize()
+        result = self._cached(self._route_cache,
+                              (self.stations[start_id].int_id, self.stations[target_id].int_id),
+                              self._fastest_route_ids)
+        if result is None:
+            return None
+        path, total_time = result
+        return ([self._by_id[station_id] for station_id in path], total_time)
 
-        # Priority queue: (total_time, station_id, current_station, path)
-        heap = []
-        heapq.heappush(heap, (0, start.idx, start, [start]))
-        best_times = {start.idx: 0}  # Track best known times to stations
+    def _fastest_route_ids(self, src: int, dst: int) -> Optional[Tuple[Tuple[int, ...], int]]:
+        """Fastest route between int_ids; returns (path int_ids, total_time).
 
-        while heap:
-            current_time, _, current_station, path = heapq.heappop(heap)
+        A target's first query runs A* on the contracted graph, which stops
+        as soon as the target is settled; on small networks a repeated target
+        fills and then reads its all-pairs row.
+        """
+        if not self._routes_ready:
+            self._prepare_routes()
+        if self._apsp_next is not None:
+            if self._apsp_seen[dst]:
+                best_times, next_hop = self._apsp_row(dst)
+                total_time = best_times[src]
+                if total_time == _INF:
+                    return None
+                path = [src]
+                while path[-1] != dst:
+                    path.append(next_hop[path[-1]])
+                return (tuple(path), total_time)
+            self._apsp_seen[dst] = 1
 
-            # Return when target is reached
-            if current_station.idx == target.idx:
-                return (path, current_time)
+        args = (self._c_indptr, self._c_indices, self._c_weights, src, dst,
+                self._dist, self._parent, self._touched, self._estimates,
+                self._xs, self._ys, self._time_per_unit, self._chain_links(src, dst))
+        try:
+            # Small integer weights (the common metro case) allow a bucket queue
+            if self._c_max_weight <= _DIAL_MAX_WEIGHT:
+                total_time = _dial_csr(*args, self._c_max_weight)
+            else:
+                total_time = _dijkstra_csr(*args)
+            if total_time is None:
+                return None
+            return (tuple(self._expand_route(dst)), total_time)
+        finally:
+            # Restore only the slots this query reached, keeping the scratch all
+            # _INF even if the search was interrupted
+            dist = self._dist
+            for station_id in self._touched:
+                dist[station_id] = _INF
+            self._touched.clear()
 
-            # Skip if better path already exists
-            if current_time > best_times.get(current_station.idx, float('inf')):
-                continue
+    def travel_times_from(self, start_id: str) -> Optional[Dict[str, int]]:
+        """Compute the shortest travel time from one station to every other.
+
+        Args:
+            start_id: Starting station ID
+
+        Returns:
+            Mapping of reachable station IDs to total time in minutes, or None
+            if the starting station does not exist
+        """
+        if start_id not in self.stations:
+            return None
+
+        if not self._finalized:
+            self.finalize()
+        best_times, _ = _delta_stepping_csr(self._indptr, self._indices, self._weights,
+                                            self.stations[start_id].int_id,
+                                            max(self._max_weight, 1))
+        return {station.idx: best_times[station.int_id]
+                for station in self._by_id if best_times[station.int_id] != _INF}
+
+    def _chain_links(self, src: int, dst: int) -> Dict[int, List[Tuple[int, int]]]:
+        """Per-query edges joining off-core endpoints to their chain ends."""
+        links: Dict[int, List[Tuple[int, int]]] = {}
+        chain_edge, chain_offset = self._chain_edge, self._chain_offset
+        if chain_edge[src] != -1:
+            edge, offset = chain_edge[src], chain_offset[src]
+            links[src] = [(self._c_from[edge], offset),
+                          (self._c_indices[edge], self._c_weights[edge] - offset)]
+            if chain_edge[dst] == edge:
+                links[src].append((dst, abs(offset - chain_offset[dst])))
+        if chain_edge[dst] != -1:
+            edge, offset = chain_edge[dst], chain_offset[dst]
+            links.setdefault(self._c_from[edge], []).append((dst, offset))
+            links.setdefault(self._c_indices[edge], []).append((dst, self._c_weights[edge] - offset))
+        return links
+
+    def _expand_route(self, dst: int) -> List[int]:
+        """Turn the contracted predecessor chain ending at dst into full int_ids."""
+        hops = []
+        while dst != -1:
+            hops.append(dst)
+            dst = self._parent[dst]
+        hops.reverse()
+
+        route = [hops[0]]
+        for u, v in zip(hops, hops[1:]):
+            route.extend(self._chain_between(u, v, self._dist[v] - self._dist[u]))
+            route.append(v)
+        return route
 
-            # Explore all neighbors
-            for neighbor, time in current_station.neighbors:
-                new_time = current_time + time
-                # Update if new path is better than known paths
-                if neighbor.idx not in best_times or new_time < best_times[neighbor.idx]:
-                    best_times[neighbor.idx] = new_time
-                    new_path = path + [neighbor]
-                    heapq.heappush(heap, (new_time, neighbor.idx, neighbor, new_path))
+    def _chain_between(self, u: int, v: int, time: int) -> Tuple[int, ...]:
+        """Interior stations, in travel order, of a contracted hop u -> v taking time."""
+        chain_edge, chain_pos, chain_offset = self._chain_edge, self._chain_pos, self._chain_offset
+        if chain_edge[u] == -1 and chain_edge[v] == -1:
+            # Core to core: pick the chain matching the time actually travelled
+            for k in range(self._c_indptr[u], self._c_indptr[u + 1]):
+                if self._c_indices[k] == v and self._c_weights[k] == time:
+                    return self._c_chains[k]
+            raise AssertionError(f"no contracted edge {u} -> {v} of time {time}")
+        if chain_edge[u] != -1 and chain_edge[v] != -1:
+            # Start and target inside the same chain
+            stations = self._c_chains[chain_edge[u]]
+            pos_u, pos_v = chain_pos[u], chain_pos[v]
+            return stations[pos_u + 1:pos_v] if pos_u < pos_v else stations[pos_v + 1:pos_u][::-1]
+        if chain_edge[u] != -1:
+            # Leaving the start's chain towards one of its ends
+            edge, pos = chain_edge[u], chain_pos[u]
+            stations = self._c_chains[edge]
+            if self._c_from[edge] == v and chain_offset[u] == time:
+                return stations[:pos][::-1]
+            return stations[pos + 1:]
+        # Entering the target's chain from one of its ends
+        edge, pos = chain_edge[v], chain_pos[v]
+        stations = self._c_chains[edge]
+        if self._c_from[edge] == u and chain_offset[v] == time:
+            return stations[:pos]
+        return stations[pos + 1:][::-1]
 
-        return None
+    def _build_path_ids(self, parent: Dict[int, int], end_id: int) -> List[Station]:
+        """Rebuild a path from an int_id predecessor map (-1 marks the start)."""
+        path = []
+        while end_id != -1:
+            path.append(self._by_id[end_id])
+            end_id = parent[end_id]
+        path.reverse()
+        return path
 
 # Example Usage ----------------------------------------------------------------
 if __name__ == "__main__":